@@ -2,28 +2,43 @@
 # -*- coding: utf-8 -*-
 """
 Rime 词典刷新与辅助码管理工具（带日志）
-功能：先移除词典中的辅助码，再刷新拼音和添加新的易学码辅助码，并记录详细操作日志
+功能：一次读写中先移除词典中的辅助码，再刷新拼音和添加新的易学码辅助码，并记录详细操作日志
 注意：本工具会直接修改源文件，请确保提前备份重要数据！
 """
 
-import os, re, shutil, tempfile, sys, logging, datetime
-from typing import Dict, List, Optional
+import os, re, tempfile, sys, logging, datetime, codecs, mmap, signal
+import multiprocessing as mp, pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import repeat
+from multiprocessing import shared_memory
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# 行级热点函数放在 _row_hot.py 中，可用 mypyc 编译；未编译时导入的是同一份纯 Python 实现
+from _row_hot import parse_row, serialize_row, _split_root, _merge_aux
 
 # 设置日志记录配置
-log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"rime_dict_refresh_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-# 配置日志格式
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger('rime_dict_refresh')
+log_file = ''  # 本次运行的日志文件，由主进程创建；子进程通过进程池初始化参数拿到同一个文件
+
+def _setup_logging(path: str):
+    """日志同时写入 path 和控制台；主进程与 spawn 子进程都调用，保证写入同一个日志文件"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(path, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+# 只在主进程中新建日志文件：spawn 子进程以 __mp_main__ 重新导入本模块时不会再建一个
+if __name__ == "__main__":
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"rime_dict_refresh_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    _setup_logging(log_file)
 
 # 检查必要的依赖包
 try:
@@ -35,6 +50,8 @@ except ImportError:
 
 try:
     from pypinyin import pinyin, Style, load_phrases_dict, load_single_dict
+    from pypinyin.constants import PINYIN_DICT, PHRASES_DICT
+    _STYLE_TONE = Style.TONE  # 绑定一次，省去每次调用时的枚举属性查找
     HAS_PYPINYIN = True
 except ImportError:
     logger.error("未安装pypinyin包，无法进行拼音处理")
@@ -44,14 +61,30 @@ except ImportError:
 INPUT_PATH  = r"D:\RimeConfig\rime-wanxiang-yx-fuzhu\dicts"  # 目录或单文件路径
 REFRESH_PINYIN = True          # 是否刷新拼音
 REFRESH_AUX_CODE = True        # 是否刷新辅助码
+REMOVE_AUX_CODE_ONLY = False   # 仅移除辅助码（不刷新拼音和辅助码）
 AUX_FILE    = r"D:\RimeConfig\Tools\dict-pinyin-tools\auxcode\手心辅易学码9.txt"  # 辅助码文件路径
 CUSTOM_PINYIN_DIR = r"D:\RimeConfig\Tools\dict-pinyin-tools\pinyin_data"  # 自定义拼音数据目录
-AUX_SEP_REGEX = r'[;\[]'       # 定义"拼音后缀"分隔符；默认匹配 `;` 与 `[`
+AUX_SEP_CHARS = ';['          # 定义"拼音后缀"分隔符（每个字符都是一个分隔符）；默认为 `;` 与 `[`
 PRESERVE_ORIGINAL_PINYIN = True  # 对于多音字，是否保留原始词典中的拼音
 # ──────────────────────────────────────
 
+_AUX_SEP_CLASS = '[' + re.escape(AUX_SEP_CHARS) + ']'
+# 从分隔符到空白前的整段后缀（即辅助码），一次 sub 去掉整列的辅助码
+_STRIP_AUX_RE = re.compile(_AUX_SEP_CLASS + r'\S*')
+# 在原始字节中查找分隔符 / 非 ASCII 字节，用于整文件跳过无需处理的文件
+_AUX_SEP_BYTES_RE = re.compile(_AUX_SEP_CLASS.encode('utf-8'))
+_NON_ASCII_BYTES_RE = re.compile(rb'[\x80-\xff]')
+# 用户词典标记（is_userdb_head 与字节预扫描共用）：userdb 的每一行都要补首列空格（含不含汉字都一样），因此带标记的文件不能整文件跳过
+_USERDB_MARKERS = ('#@/db_type\tuserdb', '# Rime user dictionary')
+_REFRESH_BYTES_RE = re.compile(b'|'.join([_NON_ASCII_BYTES_RE.pattern, _AUX_SEP_BYTES_RE.pattern]
+                                         + [re.escape(m.encode('utf-8')) for m in _USERDB_MARKERS]))
+# 汉字（含〇、扩展A~G区及兼容汉字），用于跳过不含汉字的行
+_HAN_RE = re.compile(r'[\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f]')
+
 # 表头定义
 yaml_heads = ('---', 'name:', 'version:', 'sort:', '...')
+# 表头/注释行可能的首字符：先比较首字符，绝大多数数据行无需再做前缀匹配
+_HEAD_FIRST = frozenset(h[0] for h in yaml_heads) | {'#'}
 skip_set = {
     "compatible.dict.yaml", "corrections.dict.yaml",
     "chars.dict.yaml", "people.dict.yaml", "encnnum.dict.yaml"
@@ -68,35 +101,22 @@ def load_custom_pinyin_from_directory(directory: str):
             if not fn.endswith(('.txt', '.yaml')):
                 continue
             file_path = os.path.join(directory, fn)
-            try:
-                with open(file_path, encoding='utf-8') as f:
-                    for line in f:
-                        word, *py = line.rstrip('\n').split('\t')
-                        if not py:
-                            continue
-                        plist = py[0].split()
-                        if len(word) == 1:
-                            s_map[ord(word)] = ','.join(plist)
-                        else:
-                            p_map[word] = [[p] for p in plist]
-            except UnicodeDecodeError:
-                logger.warning(f"无法解码文件 {file_path}，尝试其他编码...")
-                # 尝试使用其他常见编码
-                for encoding in ['gbk', 'latin-1']:
-                    try:
-                        with open(file_path, encoding=encoding) as f:
-                            for line in f:
-                                word, *py = line.rstrip('\n').split('\t')
-                                if not py:
-                                    continue
-                                plist = py[0].split()
-                                if len(word) == 1:
-                                    s_map[ord(word)] = ','.join(plist)
-                                else:
-                                    p_map[word] = [[p] for p in plist]
-                        break
-                    except UnicodeDecodeError:
-                        continue
+            # 先按探测到的编码读取，仅在文件中途解码失败时才换用其他编码
+            for encoding in _candidate_encodings(file_path):
+                try:
+                    with open(file_path, encoding=encoding) as f:
+                        for line in f:
+                            word, *py = line.rstrip('\n').split('\t')
+                            if not py:
+                                continue
+                            plist = py[0].split()
+                            if len(word) == 1:
+                                s_map[ord(word)] = ','.join(plist)
+                            else:
+                                p_map[word] = [[p] for p in plist]
+                    break
+                except UnicodeDecodeError:
+                    logger.warning(f"无法以 {encoding} 解码文件 {file_path}，尝试其他编码...")
     except Exception as e:
         logger.error(f"加载自定义拼音时出错: {e}")
         return
@@ -107,6 +127,12 @@ def load_custom_pinyin_from_directory(directory: str):
     if s_map:
         load_single_dict(s_map)
         logger.info(f"✓ 单字拼音加载 {len(s_map)} 条")
+    
+    # 自定义拼音会改变 pypinyin 的结果，重建单音字表并清空已缓存的拼音
+    if p_map or s_map:
+        _build_mono_tone()
+        _word_pinyin.cache_clear()
+        tone_mark.cache_clear()
 
 # ---------- 加载辅助码映射 ----------
 def load_aux_metadata(path: str) -> Dict[str, str]:
@@ -137,12 +163,9 @@ def load_aux_metadata(path: str) -> Dict[str, str]:
                 char = parts[0].strip()
                 seg_full = parts[1].strip()
                 
-                # 解析辅助码（如果辅助码部分包含分隔符）
-                seg_parts = re.split(AUX_SEP_REGEX, seg_full, maxsplit=1)
-                if len(seg_parts) > 1:
-                    aux_map[char] = seg_parts[1].strip()
-                else:
-                    aux_map[char] = seg_full.strip()
+                # 解析辅助码（如果辅助码部分包含分隔符，取第一个分隔符之后的部分）
+                suffix = _split_root(seg_full, AUX_SEP_CHARS)[1]
+                aux_map[char] = suffix[1:].strip() if suffix else seg_full
                 
                 # 修正：如果辅助码仅为 ; 或为空，设为空
                 if aux_map[char] == ';' or not aux_map[char]:
@@ -156,22 +179,65 @@ def load_aux_metadata(path: str) -> Dict[str, str]:
 
 # ---------- 类型识别 ----------
 def is_userdb_head(line: str) -> bool:
-    return '#@/db_type\tuserdb' in line or '# Rime user dictionary' in line
+    return any(m in line for m in _USERDB_MARKERS)
 
 # ---------- 拼音处理函数 ----------
+@lru_cache(maxsize=4096)
 def tone_mark(seg: str) -> str:
     """seg = 'bin;sc' → 'bīn;sc'（仅根拼音加调）"""
     if not HAS_PYPINYIN:
         return seg
     
-    root   = re.split(AUX_SEP_REGEX, seg)[0]
-    suffix = seg[len(root):]
-    py = pinyin(root, style=Style.TONE, heteronym=False, errors='ignore')
+    root, suffix = _split_root(seg, AUX_SEP_CHARS)
+    py = pinyin(root, style=_STYLE_TONE, heteronym=False, errors='ignore')
     return (py[0][0] if py else root) + suffix
 
+# 单音字（码位 → 带调拼音），由 _build_mono_tone 根据 pypinyin 的单字表生成
+_mono_tone: Dict[int, str] = {}
+
+def _build_mono_tone():
+    """生成单音字表；加载自定义单字拼音后需重新生成"""
+    global _mono_tone
+    if HAS_PYPINYIN:
+        _mono_tone = {cp: py for cp, py in PINYIN_DICT.items() if ',' not in py}
+
+def _has_phrase(word: str) -> bool:
+    """word 中是否有（两字及以上的）片段收录在 pypinyin 的词组表中"""
+    n = len(word)
+    return any(word[i:j] in PHRASES_DICT for i in range(n - 1) for j in range(i + 2, n + 1))
+
+@lru_cache(maxsize=200000)
+def _word_pinyin(word: str) -> Tuple[str, ...]:
+    """word = '编码' → ('biān', 'mǎ')；词典中同一词条反复出现，按词缓存 pypinyin 结果（有上限，避免超大词库占满内存）"""
+    # 全由单音字组成且不含词组时，pypinyin 的结果就是逐字读音，直接查表，不调用 pypinyin
+    mono = _mono_tone
+    try:
+        tones = tuple([mono[cp] for cp in map(ord, word)])
+    except KeyError:
+        pass
+    else:
+        if not _has_phrase(word):
+            return tones
+    return tuple(p[0] for p in pinyin(word, style=_STYLE_TONE, heteronym=False))
+
+_build_mono_tone()
+
 # ---------- 辅助码处理函数 ----------
-def build_seg_by_aux(word: str, aux_map: Dict[str, str]) -> List[str]:
-    return [aux_map.get(ch, '') for ch in word]
+def _make_aux_builder(aux_map: Dict[str, str]) -> Callable[[str], Tuple[str, ...]]:
+    """
+    返回逐字查辅助码的函数：word = '你好' → ('re', 'nz')，未收录的汉字取空辅助码（用 get 查询，不往 aux_map 中插入新键）。
+    结果按词缓存，同一词条反复出现时只逐字查一次
+    """
+    cache: Dict[str, Tuple[str, ...]] = {}
+    lookup = aux_map.get
+    
+    def build(word: str) -> Tuple[str, ...]:
+        aux_segs = cache.get(word)
+        if aux_segs is None:
+            aux_segs = cache[word] = tuple(map(lookup, word, repeat('')))
+        return aux_segs
+    
+    return build
 
 # ---------- 移除辅助码函数 ----------
 def remove_auxiliary_code_from_line(line: str, userdb: bool) -> str:
@@ -179,329 +245,503 @@ def remove_auxiliary_code_from_line(line: str, userdb: bool) -> str:
     cols = line.split('\t')
     
     # 确定拼音部分的索引
-    if userdb and len(cols) >= 1:
-        # 用户词典格式：拼音段(含后缀)\t汉字\t...
-        pinyin_index = 0
-    elif not userdb and len(cols) >= 2:
-        # 普通词典格式：汉字\t拼音\t...
-        pinyin_index = 1
-    else:
+    # 用户词典格式：拼音段(含后缀)\t汉字\t...；普通词典格式：汉字\t拼音\t...
+    pinyin_index = 0 if userdb else 1
+    if len(cols) <= pinyin_index:
         return line  # 格式不符合，返回原行
     
-    # 处理拼音部分，去掉辅助码
-    pinyins = cols[pinyin_index].split()
-    processed_pinyins = []
-    for pinyin_part in pinyins:
-        # 分割拼音和辅助码，使用定义的AUX_SEP_REGEX
-        pinyin_parts = re.split(AUX_SEP_REGEX, pinyin_part, maxsplit=1)
-        if pinyin_parts:
-            processed_pinyins.append(pinyin_parts[0])  # 只保留分隔符前的部分
-    
-    # 重新组合拼音部分
-    cols[pinyin_index] = ' '.join(processed_pinyins)
+    # 处理拼音部分，去掉每个拼音分隔符后的辅助码
+    cols[pinyin_index] = _STRIP_AUX_RE.sub('', cols[pinyin_index])
     
     # 重新组合行内容
     return '\t'.join(cols)
 
-# ---------- 安全地读取文件内容 ----------
-def read_file_safely(file_path: str) -> Optional[List[str]]:
-    """尝试使用多种编码安全地读取文件内容"""
-    encodings = ['utf-8', 'gbk', 'latin-1']
-    for encoding in encodings:
+# ---------- 流式读写文件 ----------
+_ENCODINGS = ('utf-8', 'gbk', 'latin-1')
+_IO_BUFFER_SIZE = 1 << 20
+
+def _detect_encoding(file_path: str) -> str:
+    """根据文件开头 4KB 判断编码（BOM → UTF-8 → GBK → latin-1），只打开一次文件"""
+    with open(file_path, 'rb') as f:
+        head = f.read(4096)
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in ('utf-8', 'gbk'):
         try:
-            with open(file_path, encoding=encoding) as f:
-                return [line.rstrip('\n') for line in f]
+            # 增量解码：末尾被截断的多字节字符不算错误
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
         except UnicodeDecodeError:
             continue
+    return 'latin-1'
+
+def _candidate_encodings(file_path: str) -> List[str]:
+    """探测到的编码优先，其余编码作为文件后段解码失败时的后备"""
+    detected = _detect_encoding(file_path)
+    return [detected] + [e for e in _ENCODINGS if e != detected]
+
+def _file_contains(file_path: str, pattern: 're.Pattern[bytes]') -> Optional[bool]:
+    """用 mmap 在文件原始字节中查找 pattern，无需解码和按行切分；文件无法读取时记录错误并返回 None"""
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False  # 空文件无法 mmap
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return pattern.search(mm) is not None
+    except OSError as e:
+        logger.error(f"读取文件失败: {os.path.basename(file_path)} ({e})")
+        return None
+
+def _iter_lines(file_path: str, encoding: str) -> Iterator[str]:
+    """按指定编码逐行读取文件（去掉行尾换行符），不把整个文件读入内存"""
+    with open(file_path, encoding=encoding, buffering=_IO_BUFFER_SIZE) as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+def _remove_temp(temp_path: Optional[str]):
+    if temp_path and os.path.exists(temp_path):
+        os.unlink(temp_path)
+
+def _rewrite_file(file_path: str, rewrite: Callable[..., Tuple[bool, tuple]]) -> Optional[Tuple[bool, tuple]]:
+    """
+    流式改写文件：逐行读取原文件，由 rewrite(lines, write) 处理后写入同目录下的临时文件。
+    rewrite 返回 (是否修改, 统计信息)；有修改时用临时文件原子替换原文件，否则丢弃临时文件。
+    先按探测到的编码读取，后段解码失败时再换用其他编码。成功返回 rewrite 的结果，失败返回 None
+    """
+    temp_dir = os.path.dirname(file_path)
+    for encoding in _candidate_encodings(file_path):
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False,
+                                             dir=temp_dir, suffix='.tmp',
+                                             buffering=_IO_BUFFER_SIZE) as tmp:
+                temp_path = tmp.name
+                modified, stats = rewrite(_iter_lines(file_path, encoding), tmp.write)
+        except UnicodeDecodeError:
+            _remove_temp(temp_path)
+            continue
+        except PermissionError as e:
+            # 不预先检查读写权限：原文件不可读时在读取处报错，目录不可写时在创建临时文件处报错
+            action = '读取' if e.filename == file_path else '写入'
+            logger.error(f"没有{action}权限: {os.path.basename(file_path)}")
+            _remove_temp(temp_path)
+            return None
+        except Exception as e:
+            logger.error(f"写入临时文件时出错: {e}")
+            # 清理临时文件
+            _remove_temp(temp_path)
+            return None
+        
+        if not modified:
+            _remove_temp(temp_path)
+            return modified, stats
+        
+        # 原子性替换文件（os.replace 在 Windows 上也可直接覆盖已存在的目标文件）
+        try:
+            os.replace(temp_path, file_path)
+            return modified, stats
+        except PermissionError:
+            logger.error(f"没有写入权限: {os.path.basename(file_path)}")
+            _remove_temp(temp_path)
+            return None
+        except Exception as e:
+            logger.error(f"替换文件失败: {e}")
+            # 清理临时文件
+            _remove_temp(temp_path)
+            return None
+    
     logger.error(f"无法解码文件 {file_path}，请检查文件编码")
     return None
 
 # ---------- 移除文件中的辅助码 ----------
-def remove_auxiliary_code_in_file(file_path: str):
-    # 跳过不需要处理的文件
-    if os.path.basename(file_path) in skip_set:
-        logger.info(f"  跳过文件: {os.path.basename(file_path)}")
-        return False
-    
-    # 检查文件是否可写
-    if not os.access(file_path, os.W_OK):
-        logger.error(f"没有写入权限: {os.path.basename(file_path)}")
-        return False
-    
+def _strip_line(line: str, userdb: bool) -> Tuple[str, bool]:
+    """移除一行的辅助码，返回 (处理后的行, 读到该行后的 userdb 标记)；表头和注释行原样保留，空白行清空"""
+    first = line[:1]
+    if first in _HEAD_FIRST and (first == '#' or line.startswith(yaml_heads)):
+        return line, userdb or (first == '#' and is_userdb_head(line))
+    if not line or line.isspace():
+        return '', userdb
+    return remove_auxiliary_code_from_line(line, userdb), userdb
+
+def _remove_aux_lines(lines: Iterator[str], write: Callable[[str], int]) -> Tuple[bool, tuple]:
     userdb = False
-    processed_lines = []
-    modified = False
     lines_removed_aux = 0
-    
-    # 1. 先将文件全部读入内存
-    lines = read_file_safely(file_path)
-    if lines is None:
-        return False
+    strip_line = _strip_line
     
     for line in lines:
-        # 处理表头和注释行
-        if line.startswith(yaml_heads) or line.startswith('#'):
-            processed_lines.append(line)
-            if is_userdb_head(line):
-                userdb = True
-            continue
-        
-        # 处理空行
-        if not line.strip():
-            processed_lines.append('')
-            continue
-        
-        # 尝试移除辅助码
-        new_line = remove_auxiliary_code_from_line(line, userdb)
-        if new_line != line:
-            modified = True
+        out, userdb = strip_line(line, userdb)
+        # 空白行清空不算移除辅助码
+        if out and out != line:
             lines_removed_aux += 1
-        processed_lines.append(new_line)
+        write(out); write('\n')
     
-    if not modified:
-        logger.info(f"  未发现需要移除辅助码的内容: {os.path.basename(file_path)}")
-        return True
-    
-    # 2. 使用临时文件写入，然后原子性替换原文件
-    temp_dir = os.path.dirname(file_path)
-    temp_path = None
+    return lines_removed_aux > 0, (lines_removed_aux,)
+
+_LONE_CR_RE = re.compile(rb'\r(?!\n)')
+_BARE_LF_RE = re.compile(rb'(?<!\r)\n')
+# 文本模式写出的换行（Windows 上为 \r\n），原地改写时与 _rewrite_file 的输出保持一致
+_NEWLINE_BYTES = os.linesep.encode('ascii')
+
+def _is_utf8(mm: mmap.mmap) -> bool:
+    """分块校验整个文件是否为合法 UTF-8，不一次性生成整个文件的字符串"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
     try:
-        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False,
-                                         dir=temp_dir, suffix='.tmp') as tmp:
-            tmp.write('\n'.join(processed_lines) + '\n')
-            temp_path = tmp.name
-        
-        # 原子性替换文件
-        try:
-            # 在Windows系统上，需要先删除目标文件
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-            shutil.move(temp_path, file_path)
-            logger.info(f"✓ 已移除文件中的辅助码: {os.path.basename(file_path)} (修改行数: {lines_removed_aux})")
-            return True
-        except Exception as e:
-            logger.error(f"替换文件失败: {e}")
-            # 清理临时文件
-            if temp_path and os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return False
-    except Exception as e:
-        logger.error(f"写入临时文件时出错: {e}")
-        # 清理临时文件
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
+        for offset in range(0, len(mm), _IO_BUFFER_SIZE):
+            decoder.decode(mm[offset:offset + _IO_BUFFER_SIZE])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
         return False
+    return True
 
-# ---------- 原地处理单个文件（刷新拼音和添加辅助码） ----------
-def process_file_in_place(file_path: str, aux_map: Dict[str, str]):
+@contextmanager
+def _deferred_signals():
+    """
+    期间收到的 SIGINT（Ctrl+C）/ SIGTERM 先记下，退出时再按原处理方式重新发出，
+    保证原地改写从写回到截断不被打断；非主线程无法设置信号处理函数，此时不做处理
+    """
+    pending: List[int] = []
+    saved = []
+    try:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            saved.append((signum, signal.signal(signum, lambda n, _f: pending.append(n))))
+    except ValueError:
+        pass
+    try:
+        yield
+    finally:
+        for signum, handler in saved:
+            signal.signal(signum, handler)
+        for signum in pending:
+            signal.raise_signal(signum)
+
+def _strip_aux_in_place(file_path: str) -> Optional[Tuple[bool, tuple]]:
+    """
+    用 mmap 原地移除辅助码：移除只会让行变短，处理后的字节从文件开头依次写回，最后截断文件，
+    省去临时文件和替换。结果与 _rewrite_file(file_path, _remove_aux_lines) 完全一致
+    （换行统一为 os.linesep、空白行清空、末行补换行）。
+    仅处理无 BOM 的 UTF-8 文件，且换行统一后不会变长（Windows 上要求原文件全部为 \r\n）；
+    其他情况，以及写入第一个字节之前出错时（只读、被占用、无法映射等）返回 None，由调用方改走临时文件流程。
+    从开始写回到截断完成，文件处于半新半旧状态，这一段屏蔽 Ctrl+C（见 _deferred_signals）；
+    进程被强制结束或断电时仍可能损坏文件，需要提前备份（见文件头的注意事项）
+    """
+    # w 为写回位置；w < 0 表示还没遇到需要修改的行，此时只读不写，文件保持原样
+    w = -1
+    try:
+        with open(file_path, 'r+b') as f, ExitStack() as write_guard:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0) as mm:
+                # 带 BOM、单独的 \r 换行或非 UTF-8 文件交给通用流程处理
+                if mm[:3] == codecs.BOM_UTF8 or _LONE_CR_RE.search(mm) or not _is_utf8(mm):
+                    return None
+                # 换行写作 \r\n 时，单独的 \n 会变长，无法原地写回
+                newline = _NEWLINE_BYTES
+                if len(newline) > 1 and _BARE_LF_RE.search(mm):
+                    return None
+                
+                # 末行没有换行符时需要补写一个，可能超出原文件长度，因此在关闭 mmap 后写入
+                missing_newline = mm[size - 1] != 0x0A
+                strip_line = _strip_line
+                userdb = False
+                lines_removed_aux = 0
+                r = 0
+                while r < size:
+                    end = mm.find(b'\n', r)
+                    nxt = end + 1 if end >= 0 else size
+                    if end < 0:
+                        end = size
+                    raw = mm[r:end]
+                    if raw.endswith(b'\r'):
+                        raw = raw[:-1]
+                    line = raw.decode('utf-8')
+                    
+                    out, userdb = strip_line(line, userdb)
+                    if out and out != line:
+                        lines_removed_aux += 1
+                        if w < 0:
+                            # 首个需要修改的行：从头以写入模式重新处理，
+                            # 使前面各行也按相同规则统一换行和空白行
+                            write_guard.enter_context(_deferred_signals())
+                            w = r = 0
+                            userdb = False
+                            lines_removed_aux = 0
+                            continue
+                    
+                    if w >= 0:
+                        data = out.encode('utf-8') if out is not line else raw
+                        mm[w:w + len(data)] = data
+                        w += len(data)
+                        if nxt > end:
+                            mm[w:w + len(newline)] = newline
+                            w += len(newline)
+                    r = nxt
+                
+                if w < 0:
+                    return False, (0,)
+                mm.flush()
+            
+            if missing_newline:
+                f.seek(w)
+                f.write(newline)
+                w += len(newline)
+            f.truncate(w)
+    except Exception:
+        if w >= 0:
+            raise
+        return None
+    return True, (lines_removed_aux,)
+
+def remove_auxiliary_code_in_file(file_path: str):
     # 跳过不需要处理的文件
     if os.path.basename(file_path) in skip_set:
         logger.info(f"  跳过文件: {os.path.basename(file_path)}")
         return False
     
-    # 检查文件是否可写
-    if not os.access(file_path, os.W_OK):
-        logger.error(f"没有写入权限: {os.path.basename(file_path)}")
+    # 文件中没有任何分隔符时不可能含辅助码，无需解码和逐行处理
+    found = _file_contains(file_path, _AUX_SEP_BYTES_RE)
+    if found is None:
+        return False
+    if not found:
+        logger.info(f"  未发现需要移除辅助码的内容: {os.path.basename(file_path)}")
+        return True
+    
+    # UTF-8 文件用 mmap 原地改写；其他编码逐行读取、处理并写入临时文件，然后原子性替换原文件
+    try:
+        result = _strip_aux_in_place(file_path)
+    except Exception as e:
+        # 写回开始之前的错误已在 _strip_aux_in_place 中改走临时文件流程，到这里时文件可能已部分改写
+        logger.error(f"原地移除辅助码时出错: {os.path.basename(file_path)}: {e}")
+        return False
+    if result is None:
+        result = _rewrite_file(file_path, _remove_aux_lines)
+    if result is None:
         return False
     
+    modified, (lines_removed_aux,) = result
+    if not modified:
+        logger.info(f"  未发现需要移除辅助码的内容: {os.path.basename(file_path)}")
+    else:
+        logger.info(f"✓ 已移除文件中的辅助码: {os.path.basename(file_path)} (修改行数: {lines_removed_aux})")
+    return True
+
+# ---------- 原地处理单个文件（刷新拼音和添加辅助码） ----------
+def _refresh_lines(lines: Iterator[str], write: Callable[[str], int],
+                   aux_map: Dict[str, str]) -> Tuple[bool, tuple]:
     userdb = False
-    processed_lines = []
     modified = False
     lines_refreshed_pinyin = 0
     lines_refreshed_aux = 0
-    
-    # 1. 先将文件全部读入内存
-    lines = read_file_safely(file_path)
-    if lines is None:
-        return False
+    # 循环内用到的全局配置和函数先绑定为局部变量，省去逐行的全局查找
+    heads, head_first = yaml_heads, _HEAD_FIRST
+    han_search = _HAN_RE.search
+    word_pinyin = _word_pinyin
+    refresh_py = REFRESH_PINYIN and HAS_PYPINYIN
+    refresh_aux = REFRESH_AUX_CODE and bool(aux_map)
+    preserve = PRESERVE_ORIGINAL_PINYIN
+    strip_aux = _STRIP_AUX_RE.sub
+    build_aux = _make_aux_builder(aux_map)
     
     for line in lines:
         # 处理表头和注释行
-        if line.startswith(yaml_heads) or line.startswith('#'):
-            processed_lines.append(line)
-            if is_userdb_head(line):
+        first = line[:1]
+        if first in head_first and (first == '#' or line.startswith(heads)):
+            write(line); write('\n')
+            if first == '#' and is_userdb_head(line):
                 userdb = True
             continue
         
         # 处理空行
-        if not line.strip():
-            processed_lines.append('')
+        if not line or line.isspace():
+            write('\n')
             continue
         
-        # 处理数据行
-        cols = line.split('\t')
-        original_line = '\t'.join(cols)
-        
-        # 安全地获取汉字部分
-        try:
-            word = cols[1] if userdb else cols[0]
-            if not word.strip():
-                processed_lines.append(line)  # 跳过空的汉字部分
-                continue
-        except IndexError:
+        # 处理数据行：只会改动拼音列，其余字段原样写回
+        row = parse_row(line, userdb)
+        if row is None:
             logger.warning(f"无效的行格式: {line[:50]}...")
-            processed_lines.append(line)
+            write(line); write('\n')
             continue
+        word = row.word
+        orig_pinyin = row.pinyin
+        
+        # 先去掉旧辅助码：与单独移除辅助码的效果相同，省去一遍整文件读写
+        if row.pinyin:
+            row.pinyin = strip_aux('', row.pinyin)
+        
+        # 不含汉字的行（英文、数字、标点、假名等，以及空的汉字部分）无需刷新拼音
+        has_han = not word.isascii() and han_search(word) is not None
         
         # 刷新拼音
-        if REFRESH_PINYIN and HAS_PYPINYIN:
+        if refresh_py and has_han:
             try:
-                if userdb and len(cols) >= 3:
-                    # 用户词典格式：拼音段(含后缀)\t汉字\t...
-                    segs = cols[0].split() if cols else []
-                    # 确保word不为空，且为非空字符串
-                    if not word.strip():
-                        processed_lines.append(line)
-                        continue
+                if userdb:
+                    # 旧辅助码已在上面整列去掉，这里的音节都是不带后缀的根拼音，无需逐个切分
+                    segs = row.pinyin.split()
                     
-                    # 对于用户词典格式，如果配置保留原始拼音，保留原始拼音
-                    if PRESERVE_ORIGINAL_PINYIN:
-                        # 保留原始拼音（无论是单字还是多字词语）
-                        # 确保segs不为空
-                        if segs:
-                            char_py = [p.split(';')[0] for p in segs]
-                        else:
-                            # 如果segs为空，使用pypinyin生成拼音
-                            char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
+                    # 对于用户词典格式，如果配置保留原始拼音且有原拼音，保留原始拼音；否则使用pypinyin生成拼音
+                    if preserve and segs:
+                        row.pinyin = ' '.join(segs)
                     else:
-                        char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
-                    
-                    new_segs = []
-                    for i, seg in enumerate(segs):
-                        base_py = char_py[i] if i < len(char_py) else tone_mark(seg)
-                        root = re.split(AUX_SEP_REGEX, seg)[0]
-                        suffix = seg[len(root):]
-                        new_segs.append(base_py + suffix)
-                    
-                    cols[0] = ' '.join(new_segs)
+                        char_py = word_pinyin(word)
+                        n = len(char_py)
+                        row.pinyin = ' '.join([char_py[i] if i < n else tone_mark(seg)
+                                               for i, seg in enumerate(segs)])
                 else:
-                    # 普通词典格式：汉字\t拼音\t...
-                    # 确保word不为空，且为非空字符串
-                    if not word.strip():
-                        processed_lines.append(line)
-                        continue
+                    # 同上，音节已不带后缀，无需再切分出根拼音和后缀
+                    segs = row.pinyin.split() if row.pinyin else []
                     
                     # 对于普通词典格式，如果配置保留原始拼音且有原拼音列，保留原始拼音
-                    if PRESERVE_ORIGINAL_PINYIN and len(cols) >= 2 and cols[1]:
-                        # 保留原始拼音（无论是单字还是多字词语）
-                        # 确保拆分后的拼音列表不为空
-                        py_parts = cols[1].split()
-                        if py_parts:
-                            char_py = [p.split(';')[0] for p in py_parts]
-                        else:
-                            # 如果原拼音列拆分后为空，使用pypinyin生成拼音
-                            char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
+                    if preserve and segs:
+                        row.pinyin = ' '.join(segs)
                     else:
-                        char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
-                    
-                    if len(cols) == 1:  # 仅汉字
-                        cols.append(' '.join(char_py))
-                    elif len(cols) >= 2 and cols[1].isdigit():  # 词 + 词频
-                        cols = [word, ' '.join(char_py)] + cols[1:]
-                    elif len(cols) >= 2:
-                        # 有原拼音列，需要保留后缀
-                        segs = cols[1].split()
-                        new_segs = []
-                        for i, py in enumerate(char_py):
-                            if i < len(segs):
-                                root = re.split(AUX_SEP_REGEX, segs[i])[0]
-                                suffix = segs[i][len(root):]
-                            else:
-                                suffix = ''
-                            new_segs.append(py + suffix)
-                        cols[1] = ' '.join(new_segs)
+                        # 仅汉字、词 + 词频、拼音列为空或不保留原拼音时，使用pypinyin生成拼音
+                        row.pinyin = ' '.join(word_pinyin(word))
                 lines_refreshed_pinyin += 1
             except Exception as e:
                 logger.warning(f"处理拼音时出错: {e}，跳过该行拼音刷新")
         
-        # 刷新辅助码
-        if REFRESH_AUX_CODE and aux_map:
+        # 刷新辅助码：已有拼音列的行照常合并；不含汉字又没有拼音列的行不补空拼音列
+        if refresh_aux and (has_han or row.pinyin is not None):
             try:
-                seg_idx = 0 if userdb else 1
-                if not userdb and len(cols) == 1:
-                    cols.insert(1, '')
-                elif userdb and len(cols) < 2:
-                    cols.append('')
-                
-                # 安全地访问列
-                if seg_idx < len(cols):
-                    raw_segs = cols[seg_idx].strip().split()
-                else:
-                    raw_segs = []
-                    if userdb:
-                        cols.insert(0, '')
-                    else:
-                        cols.insert(1, '')
-                
-                aux_segs = build_seg_by_aux(word, aux_map)
-                
-                merged = []
-                for i, py in enumerate(raw_segs):
-                    aux = aux_segs[i] if i < len(aux_segs) else ''
-                    # 如果py已经包含辅助码，先移除
-                    root = re.split(AUX_SEP_REGEX, py)[0]
-                    merged.append(f"{root};{aux}")
-                
-                if userdb:
-                    cols[0] = ' '.join(merged)
-                else:
-                    # 确保merged不为空且seg_idx有效
-                    if merged and seg_idx < len(cols):
-                        cols[seg_idx] = ' '.join(merged)
-                    elif seg_idx >= len(cols):
-                        # 如果列索引无效，添加新列
-                        cols.append(' '.join(merged))
+                raw_segs = row.pinyin.split() if row.pinyin else []
+                aux_segs = build_aux(word)
+                new_col = _merge_aux(raw_segs, aux_segs)
+                if userdb or raw_segs:
+                    row.pinyin = new_col
+                elif row.pinyin is None:
+                    row.pinyin = ''  # 补一个空的拼音列
                 lines_refreshed_aux += 1
             except Exception as e:
                 logger.warning(f"处理辅助码时出错: {e}，跳过该行辅助码刷新")
         
-        # 处理userdb格式的特殊要求
-        if userdb and cols and len(cols) > 0:
-            # 如果是userdb行且首列没空格，就补1个空格
-            if not cols[0].endswith(' '):
-                cols[0] += ' '
+        # 处理userdb格式的特殊要求：如果是userdb行且首列没空格，就补1个空格
+        if userdb and not row.pinyin.endswith(' '):
+            row.pinyin += ' '
         
-        # 检查行是否被修改
-        processed_line = '\t'.join(cols)
-        if processed_line != original_line:
+        # 仅在拼音列确有变化时才重新拼接整行
+        if row.pinyin != orig_pinyin:
             modified = True
+            line = serialize_row(row, userdb)
         
-        # 将处理后的行添加到结果中
-        processed_lines.append(processed_line)
+        # 将处理后的行写出
+        write(line); write('\n')
     
-    if not modified:
+    return modified, (lines_refreshed_pinyin, lines_refreshed_aux)
+
+def process_file_in_place(file_path: str, aux_map: Dict[str, str]):
+    # 跳过不需要处理的文件
+    if os.path.basename(file_path) in skip_set:
+        logger.info(f"  跳过文件: {os.path.basename(file_path)}")
+        return False
+    
+    # 纯 ASCII、没有分隔符也不是用户词典的文件：既没有要移除的旧辅助码，也不含需要刷新的汉字（见 _refresh_lines 中的 has_han），
+    # 也没有需要补空格的 userdb 行
+    found = _file_contains(file_path, _REFRESH_BYTES_RE)
+    if found is None:
+        return False
+    if not found:
         logger.info(f"  未发现需要刷新的内容: {os.path.basename(file_path)}")
         return True
     
-    # 2. 使用临时文件写入，然后原子性替换原文件
-    temp_dir = os.path.dirname(file_path)
-    temp_path = None
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False,
-                                         dir=temp_dir, suffix='.tmp') as tmp:
-            tmp.write('\n'.join(processed_lines) + '\n')
-            temp_path = tmp.name
-        
-        # 原子性替换文件
-        try:
-            # 在Windows系统上，需要先删除目标文件
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-            shutil.move(temp_path, file_path)
-            logger.info(f"✓ 已刷新文件: {os.path.basename(file_path)} (拼音行数: {lines_refreshed_pinyin}, 辅助码行数: {lines_refreshed_aux})")
-            return True
-        except Exception as e:
-            logger.error(f"替换文件失败: {e}")
-            # 清理临时文件
-            if temp_path and os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return False
-    except Exception as e:
-        logger.error(f"写入临时文件时出错: {e}")
-        # 清理临时文件
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
+    # 逐行读取、处理并写入临时文件，然后原子性替换原文件
+    result = _rewrite_file(file_path, lambda lines, write: _refresh_lines(lines, write, aux_map))
+    if result is None:
         return False
+    
+    modified, (lines_refreshed_pinyin, lines_refreshed_aux) = result
+    if not modified:
+        logger.info(f"  未发现需要刷新的内容: {os.path.basename(file_path)}")
+    else:
+        logger.info(f"✓ 已刷新文件: {os.path.basename(file_path)} (拼音行数: {lines_refreshed_pinyin}, 辅助码行数: {lines_refreshed_aux})")
+    return True
+
+# ---------- 递归查找词典文件 ----------
+def _walk_dict_files(path: str) -> Iterator[str]:
+    """递归列出目录下的 .txt / .yaml 文件；无法读取的目录记录后跳过（与 os.walk 相同）"""
+    try:
+        it = os.scandir(path)
+    except OSError as e:
+        logger.warning(f"无法读取目录，已跳过: {path} ({e})")
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_dict_files(entry.path)
+            elif entry.name.endswith(('.txt', '.yaml')) and entry.is_file():
+                yield entry.path
+
+# ---------- 多进程并行处理 ----------
+# 非 Windows 平台用 fork 启动子进程：直接继承主进程已加载的辅助码映射和 pypinyin 自定义词典（写时复制），
+# 无需在每个子进程中重新传递和加载；Windows 只能 spawn，由 _init_pool 从共享内存取回辅助码映射
+_USE_FORK = sys.platform != 'win32'
+_MP_CONTEXT = mp.get_context('fork' if _USE_FORK else 'spawn')
+
+# 刷新时使用的辅助码映射：主进程在创建进程池前设置，fork 子进程直接继承，spawn 子进程由 _init_pool 设置
+_pool_aux_map: Dict[str, str] = {}
+
+def _share_aux_map(aux_map: Dict[str, str]) -> shared_memory.SharedMemory:
+    """把辅助码映射序列化一次放入共享内存，供 spawn 子进程读取"""
+    data = pickle.dumps(aux_map, protocol=pickle.HIGHEST_PROTOCOL)
+    shm = shared_memory.SharedMemory(create=True, size=len(data))
+    shm.buf[:len(data)] = data
+    return shm
+
+def _init_logging(path: str):
+    """spawn 子进程初始化：日志写入主进程的日志文件"""
+    if path:
+        _setup_logging(path)
+
+def _init_pool(shm_name: str, custom_pinyin_dir: str, path: str):
+    """spawn 子进程初始化：接入主进程的日志文件，从共享内存读取辅助码映射，并加载一次自定义拼音（pypinyin 的词典按进程独立）"""
+    global _pool_aux_map
+    _init_logging(path)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _pool_aux_map = pickle.loads(shm.buf)
+    finally:
+        shm.close()
+    if REFRESH_PINYIN and custom_pinyin_dir and HAS_PYPINYIN:
+        load_custom_pinyin_from_directory(custom_pinyin_dir)
+
+def _refresh_worker(file_path: str) -> bool:
+    return process_file_in_place(file_path, _pool_aux_map)
+
+def _run_file_tasks(worker: Callable[[str], bool], tasks: List[str], desc: str,
+                    initializer: Optional[Callable] = None, initargs: tuple = ()) -> int:
+    """
+    按文件把任务分发到进程池（文件之间互不依赖），返回处理成功的文件数。
+    initializer 只在子进程中执行；当前进程的状态由调用方准备好
+    """
+    max_workers = min(os.cpu_count() or 1, len(tasks))
+    success_count = 0
+    
+    if max_workers <= 1:
+        # 单个文件或单核时直接在当前进程处理
+        bar = tqdm(tasks, desc=desc, unit="file", ncols=90) if HAS_TQDM else tasks
+        for file_path in bar:
+            if HAS_TQDM:
+                bar.set_postfix(file=os.path.basename(file_path))
+            else:
+                logger.info(f"处理文件: {os.path.basename(file_path)}")
+            if worker(file_path):
+                success_count += 1
+        return success_count
+    
+    # 文件大小差异大，任务块不宜过大，以免个别进程拖尾
+    chunksize = max(1, len(tasks) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_MP_CONTEXT,
+                             initializer=initializer, initargs=initargs) as executor:
+        results = zip(tasks, executor.map(worker, tasks, chunksize=chunksize))
+        if HAS_TQDM:
+            bar = tqdm(results, total=len(tasks), desc=desc, unit="file", ncols=90)
+            for file_path, ok in bar:
+                bar.set_postfix(file=os.path.basename(file_path))
+                success_count += bool(ok)
+        else:
+            for _file_path, ok in results:
+                success_count += bool(ok)
+    return success_count
 
 # ---------- 批量移除辅助码 ----------
 def batch_remove_auxiliary_code(path: str):
@@ -513,11 +753,7 @@ def batch_remove_auxiliary_code(path: str):
         return
     
     # 如果是目录，递归处理所有文件
-    tasks = []
-    for root, _dirs, files in os.walk(path):
-        for fn in files:
-            if fn.endswith(('.txt', '.yaml')):
-                tasks.append(os.path.join(root, fn))
+    tasks = list(_walk_dict_files(path))
     
     if not tasks:
         logger.warning(f"在路径 {path} 中未找到需要处理的文件")
@@ -525,22 +761,12 @@ def batch_remove_auxiliary_code(path: str):
     
     logger.info(f"找到 {len(tasks)} 个文件需要处理")
     
-    if HAS_TQDM:
-        bar = tqdm(tasks, desc="移除辅助码", unit="file", ncols=90)
-        success_count = 0
-        for file_path in bar:
-            bar.set_postfix(file=os.path.basename(file_path))
-            if remove_auxiliary_code_in_file(file_path):
-                success_count += 1
-        logger.info(f"移除辅助码完成: 成功 {success_count}/{len(tasks)}")
+    if _USE_FORK:
+        success_count = _run_file_tasks(remove_auxiliary_code_in_file, tasks, "移除辅助码")
     else:
-        # 如果没有tqdm包，使用普通循环
-        success_count = 0
-        for file_path in tasks:
-            logger.info(f"处理文件: {os.path.basename(file_path)}")
-            if remove_auxiliary_code_in_file(file_path):
-                success_count += 1
-        logger.info(f"移除辅助码完成: 成功 {success_count}/{len(tasks)}")
+        success_count = _run_file_tasks(remove_auxiliary_code_in_file, tasks, "移除辅助码",
+                                        initializer=_init_logging, initargs=(log_file,))
+    logger.info(f"移除辅助码完成: 成功 {success_count}/{len(tasks)}")
 
 # ---------- 批量处理文件或目录（刷新拼音和辅助码） ----------
 def batch_refresh_dict_files(path: str, aux_map: Dict[str, str]):
@@ -552,11 +778,7 @@ def batch_refresh_dict_files(path: str, aux_map: Dict[str, str]):
         return
     
     # 如果是目录，递归处理所有文件
-    tasks = []
-    for root, _dirs, files in os.walk(path):
-        for fn in files:
-            if fn.endswith(('.txt', '.yaml')):
-                tasks.append(os.path.join(root, fn))
+    tasks = list(_walk_dict_files(path))
     
     if not tasks:
         logger.warning(f"在路径 {path} 中未找到需要处理的文件")
@@ -564,22 +786,20 @@ def batch_refresh_dict_files(path: str, aux_map: Dict[str, str]):
     
     logger.info(f"找到 {len(tasks)} 个文件需要处理")
     
-    if HAS_TQDM:
-        bar = tqdm(tasks, desc="刷新词典", unit="file", ncols=90)
-        success_count = 0
-        for file_path in bar:
-            bar.set_postfix(file=os.path.basename(file_path))
-            if process_file_in_place(file_path, aux_map):
-                success_count += 1
-        logger.info(f"刷新词典完成: 成功 {success_count}/{len(tasks)}")
+    global _pool_aux_map
+    _pool_aux_map = aux_map
+    if _USE_FORK:
+        success_count = _run_file_tasks(_refresh_worker, tasks, "刷新词典")
     else:
-        # 如果没有tqdm包，使用普通循环
-        success_count = 0
-        for file_path in tasks:
-            logger.info(f"处理文件: {os.path.basename(file_path)}")
-            if process_file_in_place(file_path, aux_map):
-                success_count += 1
-        logger.info(f"刷新词典完成: 成功 {success_count}/{len(tasks)}")
+        shm = _share_aux_map(aux_map)
+        try:
+            success_count = _run_file_tasks(_refresh_worker, tasks, "刷新词典",
+                                            initializer=_init_pool,
+                                            initargs=(shm.name, CUSTOM_PINYIN_DIR, log_file))
+        finally:
+            shm.close()
+            shm.unlink()
+    logger.info(f"刷新词典完成: 成功 {success_count}/{len(tasks)}")
 
 # ---------- 主入口 ----------
 if __name__ == "__main__":
@@ -588,7 +808,7 @@ if __name__ == "__main__":
     logger.warning("⚠️ 警告：本工具会直接修改源文件，请确保已备份重要数据！")
     
     # 检查是否需要拼音处理但缺少必要依赖
-    if REFRESH_PINYIN and not HAS_PYPINYIN:
+    if REFRESH_PINYIN and not REMOVE_AUX_CODE_ONLY and not HAS_PYPINYIN:
         logger.error("需要进行拼音处理，但未找到pypinyin包")
         logger.error("请安装pypinyin包: pip install pypinyin")
         sys.exit(1)
@@ -600,18 +820,19 @@ if __name__ == "__main__":
             logger.error("请修改配置区中的 INPUT_PATH 参数指向有效的文件或目录")
             sys.exit(1)
         
-        # 第一步：移除词典中的辅助码
-        batch_remove_auxiliary_code(INPUT_PATH)
-        
-        # 第二步：加载自定义拼音（如果需要）
-        if REFRESH_PINYIN and CUSTOM_PINYIN_DIR and HAS_PYPINYIN:
-            load_custom_pinyin_from_directory(CUSTOM_PINYIN_DIR)
-        
-        # 第三步：加载辅助码（如果需要）
-        aux_map = load_aux_metadata(AUX_FILE) if REFRESH_AUX_CODE else {}
-        
-        # 第四步：刷新拼音和添加新的辅助码
-        batch_refresh_dict_files(INPUT_PATH, aux_map)
+        if REMOVE_AUX_CODE_ONLY:
+            # 仅移除词典中的辅助码
+            batch_remove_auxiliary_code(INPUT_PATH)
+        else:
+            # 第一步：加载自定义拼音（如果需要）
+            if REFRESH_PINYIN and CUSTOM_PINYIN_DIR and HAS_PYPINYIN:
+                load_custom_pinyin_from_directory(CUSTOM_PINYIN_DIR)
+            
+            # 第二步：加载辅助码（如果需要）
+            aux_map = load_aux_metadata(AUX_FILE) if REFRESH_AUX_CODE else {}
+            
+            # 第三步：移除旧辅助码、刷新拼音并添加新的辅助码（同一遍处理）
+            batch_refresh_dict_files(INPUT_PATH, aux_map)
         
     except KeyboardInterrupt:
         logger.info("\n[INFO] 用户中断了处理过程")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+MainRime.py 逐行处理的热点函数（行解析 / 拼接、音节切分与合并）。
+只用到 str / list / tuple 等内置类型并带完整类型注解，可直接用 mypyc 编译：
+    pip install mypy && mypyc _row_hot.py
+编译生成的扩展模块会优先于本文件被导入；未编译时使用的就是本文件的纯 Python 实现。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+
+# ---------- 词典行解析 ----------
+@dataclass
+class Row:
+    """
+    一行词条。普通词典：汉字\t拼音\t词频...；用户词典：拼音段 \t汉字\t...
+    pinyin 为 None 表示没有拼音列（仅汉字，或 汉字\t词频）；rest 为其余各列（含前导制表符），原样保留
+    """
+    word: str
+    pinyin: Optional[str]
+    freq: Optional[str]
+    rest: str
+
+def parse_row(line: str, userdb: bool) -> Optional[Row]:
+    """按制表符位置把数据行切成各字段，不拆分整行；用户词典行缺少汉字列时返回 None"""
+    i1 = line.find('\t')
+    if i1 < 0:
+        return None if userdb else Row(line, None, None, '')
+    i2 = line.find('\t', i1 + 1)
+    second = line[i1 + 1:i2] if i2 >= 0 else line[i1 + 1:]
+    rest = line[i2:] if i2 >= 0 else ''
+    if userdb:
+        return Row(second, line[:i1], None, rest)
+    if second.isdigit():  # 汉字 + 词频，没有拼音列
+        return Row(line[:i1], None, second, rest)
+    return Row(line[:i1], second, None, rest)
+
+def serialize_row(row: Row, userdb: bool) -> str:
+    if userdb:
+        return f"{row.pinyin}\t{row.word}{row.rest}"
+    parts = [row.word]
+    if row.pinyin is not None:
+        parts.append(row.pinyin)
+    if row.freq is not None:
+        parts.append(row.freq)
+    return '\t'.join(parts) + row.rest
+
+# ---------- 拼音后缀切分 ----------
+def _split_root(seg: str, seps: str) -> Tuple[str, str]:
+    """seg = 'bin;sc', seps = ';[' → ('bin', ';sc')；在 seps 中任一字符最先出现处切分"""
+    k = -1
+    for c in seps:
+        i = seg.find(c)
+        if i >= 0 and (k < 0 or i < k):
+            k = i
+    return (seg, '') if k < 0 else (seg[:k], seg[k:])
+
+# ---------- 辅助码拼接 ----------
+def _merge_aux(raw_segs: List[str], aux_segs: Sequence[str]) -> str:
+    """
+    raw_segs = ['ni', 'hao'], aux_segs = ['re', 'ya'] → 'ni;re hao;ya'
+    raw_segs 须为已去掉旧辅助码的根拼音（刷新时整列先经 _STRIP_AUX_RE 处理），这里不再逐个切分
+    """
+    n = len(aux_segs)
+    out: List[str] = []
+    for i, py in enumerate(raw_segs):
+        out.append(f"{py};{aux_segs[i] if i < n else ''}")
+    return ' '.join(out)
@@ -1,5 +1,10 @@
 import os
 import re
+import shutil
+import tempfile
+
+# 分号及其后直到空白前的内容（即辅助码）
+STRIP_AUX_RE = re.compile(r';\S*')
 
 # 设置dicts文件夹路径（固定路径，后续可在此处修改）
 dicts_folder = r"D:\RimeConfig\rime-wanxiang-yx-fuzhu\dicts"
@@ -26,67 +31,56 @@ for file in dict_files:
 for dict_file in dict_files:
     file_path = os.path.join(dicts_folder, dict_file)
     
-    # 读取文件内容
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 处理文件内容
-    lines = content.split('\n')
-    processed_lines = []
-    
-    # 用于判断是否在元数据部分
-    in_metadata = False
-    
-    for line in lines:
-        # 处理元数据开始标记
-        if line.strip() == '---':
-            in_metadata = True
-            processed_lines.append(line)
-            continue
-        
-        # 处理元数据结束标记
-        if line.strip() == '...':
+    # 符号链接按其指向的实际文件处理；临时文件建在实际文件所在目录，保证 os.replace 不跨文件系统
+    target_path = os.path.realpath(file_path)
+    temp_path = None
+    try:
+        # 逐行读取、处理并写入临时文件，不把整个文件读入内存
+        with open(target_path, 'r', encoding='utf-8') as f, \
+             tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(target_path),
+                                         suffix='.tmp', delete=False) as out:
+            temp_path = out.name
+            
+            # 用于判断是否在元数据部分
             in_metadata = False
-            processed_lines.append(line)
-            continue
-        
-        # 保留元数据部分不处理
-        if in_metadata:
-            processed_lines.append(line)
-            continue
-        
-        # 保留注释行不处理
-        if line.strip().startswith('#'):
-            processed_lines.append(line)
-            continue
-        
-        # 处理词典内容行
-        # 分割行内容，使用Tab作为分隔符
-        parts = line.split('\t')
-        if len(parts) >= 2:
-            # 处理拼音部分，去掉辅助码
-            # 先按空格分割多个拼音
-            pinyins = parts[1].split()
-            # 对每个拼音单独处理，去除辅助码
-            processed_pinyins = []
-            for pinyin in pinyins:
-                # 分割拼音和辅助码
-                pinyin_parts = pinyin.split(';')
-                if pinyin_parts:
-                    processed_pinyins.append(pinyin_parts[0])  # 只保留分号前的部分
-            # 重新组合拼音部分
-            parts[1] = ' '.join(processed_pinyins)
             
-            # 重新组合行内容
-            processed_line = '\t'.join(parts)
-            processed_lines.append(processed_line)
-        else:
-            # 如果行格式不符合预期，保留原始行
-            processed_lines.append(line)
-    
-    # 写回处理后的内容
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(processed_lines))
+            for raw in f:
+                line = raw.rstrip('\n')
+                newline = raw[len(line):]  # 末行可能没有换行符，保持原样
+                
+                # 处理元数据开始标记
+                if line.strip() == '---':
+                    in_metadata = True
+                # 处理元数据结束标记
+                elif line.strip() == '...':
+                    in_metadata = False
+                # 保留元数据部分和注释行不处理
+                elif in_metadata or line.strip().startswith('#'):
+                    pass
+                else:
+                    # 处理词典内容行
+                    # 分割行内容，使用Tab作为分隔符
+                    parts = line.split('\t')
+                    if len(parts) >= 2:
+                        # 处理拼音部分，一次性去掉每个拼音分号后的辅助码
+                        parts[1] = STRIP_AUX_RE.sub('', parts[1])
+                        
+                        # 重新组合行内容
+                        line = '\t'.join(parts)
+                    # 如果行格式不符合预期，保留原始行
+                
+                out.write(line)
+                out.write(newline)
+        
+        # 临时文件默认权限为 0600，替换前沿用原文件的权限
+        shutil.copymode(target_path, temp_path)
+        # 用处理后的内容替换原文件
+        os.replace(temp_path, target_path)
+    except BaseException:
+        # 出错或中断时清理临时文件，原文件保持不变
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
     
     print(f"已处理文件：{dict_file}")
 
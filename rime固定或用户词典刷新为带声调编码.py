@@ -10,14 +10,17 @@
 单列汉字\t旧编码\t数字>单列汉字\t拼音\t数字
 """
 
-import os, re
+import os, sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from tqdm import tqdm
 from pypinyin import pinyin, Style, load_phrases_dict, load_single_dict
 
 # ─────────────────────────────────────────────────────────
 # 你的词典用什么分隔辅助码？
 # ─────────────────────────────────────────────────────────
-AUX_SEP_REGEX = r'[;\[]'           # 定义“拼音后缀”分隔符；默认匹配 `;` 与 `[`
+AUX_SEP_CHARS = ';['               # 定义“拼音后缀”分隔符（每个字符都是一个分隔符）；默认为 `;` 与 `[`
 
 
 # ─────────────────────────────────────────────────────────
@@ -53,17 +56,34 @@ def load_custom_pinyin_from_directory(directory: str):
 # 表头和类型识别
 # ─────────────────────────────────────────────────────────
 yaml_heads = ('---', 'name:', 'version:', 'sort:', '...')
+# 表头/注释行可能的首字符：绝大多数数据行只需一次集合查找即可排除
+_HEAD_FIRST = frozenset(h[0] for h in yaml_heads) | {'#'}
 
 def is_userdb_head(line: str) -> bool:
     return '#@/db_type\tuserdb' in line or '# Rime user dictionary' in line
 
+def _split_aux(seg: str) -> tuple[str, str]:
+    """seg = 'bin;sc' → ('bin', ';sc')"""
+    i = -1
+    for c in AUX_SEP_CHARS:
+        j = seg.find(c)
+        if j >= 0 and (i < 0 or j < i):
+            i = j
+    return (seg, '') if i < 0 else (seg[:i], seg[i:])
+
+@lru_cache(maxsize=4096)
 def tone_mark(seg: str) -> str:
     """seg = 'bin;sc' → 'bīn;sc'（仅根拼音加调）"""
-    root   = re.split(AUX_SEP_REGEX, seg)[0]
-    suffix = seg[len(root):]
+    root, suffix = _split_aux(seg)
     py = pinyin(root, style=Style.TONE, heteronym=False, errors='ignore')
     return (py[0][0] if py else root) + suffix
 
+# 词典中同一词条常在多行、多个文件中重复出现，按词缓存 pypinyin 结果（有上限，避免超大词库占满内存）
+@lru_cache(maxsize=200000)
+def word_tones(word: str) -> tuple[str, ...]:
+    """word = '编码' → ('biān', 'mǎ')"""
+    return tuple(p[0] for p in pinyin(word, style=Style.TONE, heteronym=False))
+
 
 # ─────────────────────────────────────────────────────────
 # 按行处理
@@ -71,7 +91,7 @@ def tone_mark(seg: str) -> str:
 def normal_line(cols: list[str]) -> str:
     """普通词表行拼音修正；保留后缀 (;xx / [xx])"""
     word = cols[0]
-    char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
+    char_py = word_tones(word)
 
     if len(cols) == 1:                      # 仅汉字
         cols.append(' '.join(char_py))
@@ -86,8 +106,7 @@ def normal_line(cols: list[str]) -> str:
     new_segs = []
     for i, py in enumerate(char_py):
         if i < len(segs):
-            root = re.split(AUX_SEP_REGEX, segs[i])[0]
-            suffix = segs[i][len(root):]
+            suffix = _split_aux(segs[i])[1]
         else:
             suffix = ''
         new_segs.append(py + suffix)
@@ -102,13 +121,12 @@ def userdb_line(cols: list[str]) -> str:
     """
     segs = cols[0].split()
     word = cols[1]
-    char_py = [p[0] for p in pinyin(word, style=Style.TONE, heteronym=False)]
+    char_py = word_tones(word)
 
     new_segs = []
     for i, seg in enumerate(segs):
         base_py = char_py[i] if i < len(char_py) else tone_mark(seg)
-        root    = re.split(AUX_SEP_REGEX, seg)[0]
-        suffix  = seg[len(root):]
+        suffix  = _split_aux(seg)[1]
         new_segs.append(base_py + suffix)
 
     cols[0] = ' '.join(new_segs)
@@ -118,6 +136,8 @@ def userdb_line(cols: list[str]) -> str:
 # ─────────────────────────────────────────────────────────
 # 单文件处理
 # ─────────────────────────────────────────────────────────
+_IO_BUFFER_SIZE = 1 << 20  # 读写缓冲 1MB，逐行写出时减少系统调用
+
 skip_set = {
     "compatible.dict.yaml", "corrections.dict.yaml",
     "chars.dict.yaml", "people.dict.yaml", "encnnum.dict.yaml"
@@ -130,16 +150,18 @@ def process_single_file(src: str, dst: str):
         return
 
     userdb = False
-    with open(src, encoding='utf-8') as s, open(dst, 'w', encoding='utf-8') as d:
+    with open(src, encoding='utf-8', buffering=_IO_BUFFER_SIZE) as s, \
+         open(dst, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as d:
         for raw in s:
             line = raw.rstrip('\n')
 
-            if line.startswith(yaml_heads) or line.startswith('#'):
-                d.write(line + '\n')
-                if is_userdb_head(line):
+            first = line[:1]
+            if first in _HEAD_FIRST and (first == '#' or line.startswith(yaml_heads)):
+                d.write(line); d.write('\n')
+                if first == '#' and is_userdb_head(line):
                     userdb = True
                 continue
-            if not line.strip():
+            if not line or line.isspace():
                 d.write('\n'); continue
 
             cols = line.split('\t')
@@ -147,18 +169,50 @@ def process_single_file(src: str, dst: str):
 
             # ─── 如果是 userdb 行且首列没空格，就补 1 个空格 ───
             if userdb:
-                seg, *rest = newline.split('\t', 1)
-                if not seg.endswith(' '):
-                    seg += ' '
-                    newline = '\t'.join([seg] + rest)
+                # 按首个制表符的位置直接插入空格，不拆分整行再拼接
+                i = newline.find('\t')
+                if i < 0:
+                    i = len(newline)
+                if i == 0 or newline[i - 1] != ' ':
+                    newline = newline[:i] + ' ' + newline[i:]
 
-            d.write(newline + '\n')  
+            d.write(newline); d.write('\n')
 
 
 # ─────────────────────────────────────────────────────────
 # 目录 / 单文件 处理 + tqdm
 # ─────────────────────────────────────────────────────────
-def process_files(path_in: str, path_out: str):
+def _collect_tasks(src_dir: str, dst_dir: str, tasks: list[tuple[str, str]]):
+    """递归收集 src_dir 下的 (源文件, 目标文件) 到 tasks，并按需创建对应的输出目录；无法读取的目录跳过"""
+    try:
+        it = os.scandir(src_dir)
+    except OSError as e:
+        print(f"[WARN] 无法读取目录，已跳过: {src_dir} ({e})")
+        return
+    made = False
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _collect_tasks(entry.path, os.path.join(dst_dir, entry.name), tasks)
+            elif entry.name.endswith(('.txt', '.yaml')) and entry.is_file():
+                if not made:
+                    os.makedirs(dst_dir, exist_ok=True)
+                    made = True
+                tasks.append((entry.path, os.path.join(dst_dir, entry.name)))
+
+_USE_FORK = sys.platform != 'win32'
+
+def _init_worker(custom_dir: str):
+    """spawn 子进程初始化：重新加载自定义拼音"""
+    if custom_dir:
+        load_custom_pinyin_from_directory(custom_dir)
+
+def _process_task(task: tuple[str, str]) -> tuple[str, str]:
+    process_single_file(*task)
+    return task
+
+def process_files(path_in: str, path_out: str, custom_dir: str):
+    """custom_dir 须与当前进程已加载的自定义拼音目录一致（未加载时传 ""），spawn 子进程据此重新加载"""
     # ————————————————— 单文件 —————————————————
     if os.path.isfile(path_in):
         # 判断 path_out 是目录还是文件
@@ -177,21 +231,28 @@ def process_files(path_in: str, path_out: str):
 
     # ————————————————— 目录递归 —————————————————
     tasks = []
-    for root, _dirs, files in os.walk(path_in):
-        for fn in files:
-            if not fn.endswith(('.txt', '.yaml')):
-                continue
-            rel  = os.path.relpath(root, path_in)
-            ddir = os.path.join(path_out, rel)
-            os.makedirs(ddir, exist_ok=True)
-            tasks.append((os.path.join(root, fn),
-                          os.path.join(ddir, fn)))
+    _collect_tasks(path_in, path_out, tasks)
+
+    # 各文件互不依赖，多个文件时分给多个进程并行处理
+    max_workers = min(os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        bar = tqdm(tasks, desc="处理文件", unit="file", ncols=90)
+        for src, dst in bar:
+            bar.set_postfix(file=os.path.basename(src))
+            process_single_file(src, dst)
+            tqdm.write(f"✓ 完成 {os.path.basename(src)} → {os.path.relpath(dst, path_out)}")
+        return
 
-    bar = tqdm(tasks, desc="处理文件", unit="file", ncols=90)
-    for src, dst in bar:
-        bar.set_postfix(file=os.path.basename(src))
-        process_single_file(src, dst)
-        tqdm.write(f"✓ 完成 {os.path.basename(src)} → {os.path.relpath(dst, path_out)}")
+    # fork 的子进程直接继承已加载的自定义拼音；spawn（Windows）的子进程需要重新加载
+    ctx = mp.get_context('fork' if _USE_FORK else 'spawn')
+    initializer, initargs = (None, ()) if _USE_FORK else (_init_worker, (custom_dir,))
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                             initializer=initializer, initargs=initargs) as executor:
+        bar = tqdm(executor.map(_process_task, tasks), total=len(tasks),
+                   desc="处理文件", unit="file", ncols=90)
+        for src, dst in bar:
+            bar.set_postfix(file=os.path.basename(src))
+            tqdm.write(f"✓ 完成 {os.path.basename(src)} → {os.path.relpath(dst, path_out)}")
 
 
 # ─────────────────────────────────────────────────────────
@@ -204,5 +265,5 @@ if __name__ == "__main__":
     custom_dir = "pinyin_data"
 
     load_custom_pinyin_from_directory(custom_dir)
-    process_files(input_dir, output_dir)
+    process_files(input_dir, output_dir, custom_dir)
     print("✓ 全部文件处理完成")
\ No newline at end of file
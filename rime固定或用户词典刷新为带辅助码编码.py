@@ -8,9 +8,9 @@ rime固定词典或者用户词典刷新为带辅助码的格式.py
 """
 
 from __future__ import annotations
-import os, re, shutil
+import os, shutil
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from tqdm import tqdm
 
 # ─────────────── 配 置 区 ────────────────
@@ -19,8 +19,10 @@ OUTPUT_PATH = "/home/amz/Documents/输入法方案/万象拼音/outbase.dict.yam
 AUX_FILE    = "/home/amz/Documents/辅助码.txt"  # 这里使用你选择的辅助码词库中的单字表作为数据源 格式  你\tni;re  你\t;re  你\tre三种格式都是支持的
 # ──────────────────────────────────────
 
-AUX_SEP_REGEX = r'[;\[]'
+AUX_SEP_CHARS = ';['  # 辅助码分隔符（每个字符都是一个分隔符）；默认为 `;` 与 `[`
 yaml_heads = ('---', 'name:', 'version:', 'sort:', '...')
+# 表头/注释行可能的首字符：绝大多数数据行只需一次集合查找即可排除
+_HEAD_FIRST = frozenset(h[0] for h in yaml_heads) | {'#'}
 
 # ---------- 判断输出路径像目录 ----------
 def is_dir_like(p: str) -> bool:
@@ -29,6 +31,15 @@ def is_dir_like(p: str) -> bool:
             or not os.path.splitext(p)[1])# 无扩展名
 
 # ---------- 加载辅助码映射 ----------
+def _partition_aux(s: str) -> Tuple[str, str, str]:
+    """'ni;re' → ('ni', ';', 're')；找不到分隔符时为 (s, '', '')"""
+    i = -1
+    for c in AUX_SEP_CHARS:
+        j = s.find(c)
+        if j >= 0 and (i < 0 or j < i):
+            i = j
+    return (s, '', '') if i < 0 else (s[:i], s[i], s[i + 1:])
+
 def load_aux_metadata(path: str) -> Dict[str, str]:
     aux_map: Dict[str, str] = {}
     with open(path, encoding='utf-8') as f:
@@ -40,11 +51,8 @@ def load_aux_metadata(path: str) -> Dict[str, str]:
                 continue
             char = parts[0]
             seg_full = parts[1]
-            seg_parts = re.split(AUX_SEP_REGEX, seg_full, maxsplit=1)
-            if len(seg_parts) > 1:
-                aux_map[char] = seg_parts[1].strip()
-            else:
-                aux_map[char] = seg_full.strip()
+            _root, sep, aux = _partition_aux(seg_full)
+            aux_map[char] = aux.strip() if sep else seg_full.strip()
             # 修正：如果辅助码仅为 ; 或为空，设为空
             if aux_map[char] == ';':
                 aux_map[char] = ''
@@ -58,42 +66,39 @@ def build_seg_by_aux(word: str, aux_map: Dict[str, str]) -> List[str]:
 
 def refresh_aux(cols: List[str], word: str, aux_map: Dict[str, str], userdb: bool):
     seg_idx = 0 if userdb else 1
-    if not userdb and len(cols) == 1:
-        cols.insert(1, '')
-    if userdb and len(cols) < 2:
+    # 两种格式都至少需要 2 列（普通词典补空拼音列，userdb 补空汉字列），末尾追加即可
+    if len(cols) < 2:
         cols.append('')
 
-    raw_segs = cols[seg_idx].strip().split() if seg_idx < len(cols) else []
+    raw_segs = cols[seg_idx].strip().split()
     aux_segs = build_seg_by_aux(word, aux_map)
 
-    merged = []
-    for i, py in enumerate(raw_segs):
-        aux = aux_segs[i] if i < len(aux_segs) else ''
-        merged.append(f"{py};{aux}")
-    if userdb:
-        cols[0] = ' '.join(merged)
-    else:
-        cols[seg_idx] = ' '.join(merged)
-
+    n = len(aux_segs)
+    cols[seg_idx] = ' '.join([f"{py};{aux_segs[i] if i < n else ''}"
+                              for i, py in enumerate(raw_segs)])
     return cols
 
 def is_userdb_head(line: str) -> bool:
     return '#@/db_type\tuserdb' in line or '# Rime user dictionary' in line
 
+_IO_BUFFER_SIZE = 1 << 20  # 读写缓冲 1MB，逐行写出时减少系统调用
+
 # ---------- 单文件 ----------
 def process_single_file(src: str, dst: str, aux_map: Dict[str, str]):
     userdb = False
-    with open(src, encoding='utf-8') as s, open(dst, 'w', encoding='utf-8') as d:
+    with open(src, encoding='utf-8', buffering=_IO_BUFFER_SIZE) as s, \
+         open(dst, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as d:
         for raw in s:
             line = raw.rstrip('\n')
 
             # 透传 YAML/注释
-            if line.startswith(yaml_heads) or line.startswith('#'):
-                d.write(line + '\n')
-                if is_userdb_head(line):
+            first = line[:1]
+            if first in _HEAD_FIRST and (first == '#' or line.startswith(yaml_heads)):
+                d.write(line); d.write('\n')
+                if first == '#' and is_userdb_head(line):
                     userdb = True
                 continue
-            if not line.strip():
+            if not line or line.isspace():
                 d.write('\n')
                 continue
 
@@ -105,10 +110,28 @@ def process_single_file(src: str, dst: str, aux_map: Dict[str, str]):
             if userdb and not cols[0].endswith(' '):
                 cols[0] += ' '
 
-            d.write('\t'.join(cols) + '\n')   # 直接写出，不再 rstrip('\t')
+            d.write('\t'.join(cols)); d.write('\n')   # 直接写出，不再 rstrip('\t')
 
 
 # ---------- 目录递归 ----------
+def _collect_tasks(src_dir: str, dst_dir: str, tasks: List[Tuple[str, str]]):
+    """递归收集 src_dir 下的 (源文件, 目标文件) 到 tasks，并按需创建对应的输出目录；无法读取的目录跳过"""
+    try:
+        it = os.scandir(src_dir)
+    except OSError as e:
+        print(f"[WARN] 无法读取目录，已跳过: {src_dir} ({e})")
+        return
+    made = False
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _collect_tasks(entry.path, os.path.join(dst_dir, entry.name), tasks)
+            elif entry.name.endswith(('.txt', '.yaml')) and entry.is_file():
+                if not made:
+                    Path(dst_dir).mkdir(parents=True, exist_ok=True)
+                    made = True
+                tasks.append((entry.path, os.path.join(dst_dir, entry.name)))
+
 def process_files(path_in: str, path_out: str, aux_map: Dict[str, str]):
     # —— 输入是单文件 ——
     if os.path.isfile(path_in):
@@ -121,15 +144,7 @@ def process_files(path_in: str, path_out: str, aux_map: Dict[str, str]):
 
     # —— 输入是目录，递归处理 ——
     tasks = []
-    for root, _dirs, files in os.walk(path_in):
-        for fn in files:
-            if not fn.endswith(('.txt', '.yaml')):
-                continue
-            rel  = os.path.relpath(root, path_in)
-            ddir = os.path.join(path_out, rel)
-            Path(ddir).mkdir(parents=True, exist_ok=True)
-            tasks.append((os.path.join(root, fn),
-                          os.path.join(ddir, fn)))
+    _collect_tasks(path_in, path_out, tasks)
 
     bar = tqdm(tasks, desc="刷辅助码", unit="file", ncols=90)
     for src, dst in bar: